@@ -1,118 +1,534 @@
 #!/usr/bin/env python3
 
-from flask import Flasks, request, jsonify
-import xml.etree.ElementTree as ET
-from typing import List, Dict, Tuple
+from flask import Flask, Response, request, jsonify
+from flask.json.provider import DefaultJSONProvider
+from lxml import etree
+from typing import IO, List, Dict, Optional, Tuple, Union
+from dataclasses import dataclass, field
+import hashlib
+import io
+import json
 import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
 from datetime import datetime, timedelta, timezone
+from functools import cached_property, lru_cache
 import math
+import numpy as np
+import orjson
+from numba import njit, prange
 import requests
-import pytz
+from requests.adapters import HTTPAdapter
+import urllib3
+from urllib3.util.retry import Retry
 import time
 from astropy import coordinates
 from astropy import units
 from astropy.time import Time
+from geopy.exc import GeopyError
 from geopy.geocoders import Nominatim
 
+def _orjson_default(obj):
+    # orjson only handles plain numeric/datetime ndarrays natively
+    if isinstance(obj, np.ndarray):
+        return obj.tolist() if obj.dtype.kind == 'U' else np.asarray(obj)
+    # everything else (Decimal, UUID, objects with __html__, ...) as Flask's default provider does
+    return DefaultJSONProvider.default(obj)
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON provider that serializes with orjson, which handles floats and NumPy arrays in C.
+    """
+    def dumps(self, obj, **kwargs) -> str:
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2  # the only indent orjson supports
+        return orjson.dumps(obj, default=_orjson_default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 ISS_DATA_URL = 'https://nasa-public-data.s3.amazonaws.com/iss-coords/current/ISS_OEM/ISS.OEM_J2K_EPH.xml'
 
-def compute_location_astropy(sv):
-    x = float(sv['x'])
-    y = float(sv['y'])
-    z = float(sv['z'])
+# Seconds to wait for the NASA server before giving up on a fetch
+REQUEST_TIMEOUT = 10
+
+# The OEM file is regenerated on the order of hours, so one download per hour is plenty
+CACHE_TIMEOUT = 3600
+
+# Seconds to wait before retrying when the data could not be loaded and there is nothing to serve
+LOAD_RETRY_DELAY = 10
+
+# Parsed and transformed data is saved here so other worker processes can memory-map it
+# instead of repeating the download, parse and astropy transform
+CACHE_DIR = os.environ.get('ISS_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'iss_tracker'))
+
+# Current time in nanoseconds since the Unix epoch, the units of OemData.epochs_ns
+_now_ns = time.time_ns
+
+# Cache entries are named by the SHA-1 of the data's version; entries being written
+# carry this prefix until they are renamed into place
+CACHE_TMP_PREFIX = 'tmp-'
+_CACHE_ENTRY_RE = re.compile(r'[0-9a-f]{40}')
+
+# OemData fields stored as one .npy file each in the on-disk cache
+CACHED_ARRAYS = ('epoch_strs', 'epochs', 'x', 'y', 'z', 'x_dot', 'y_dot', 'z_dot', 'speeds', 'lat', 'lon', 'height')
+
+TIME_FORMATS = (
+    '%Y-%jT%H:%M:%S.%fZ',  # Format with ordinal day and fractional seconds
+    '%Y-%jT%H:%M:%SZ',     # Format with ordinal day, without fractional seconds
+    '%Y-%m-%dT%H:%M:%S.%fZ',  # Format with month-day and fractional seconds
+    '%Y-%m-%dT%H:%M:%SZ',     # Format with month-day, without fractional seconds
+    # ... you can add more formats if needed
+)
+
+# Ordinal-day epochs as published in the OEM feed, e.g. '2024-067T08:28:00.000Z'
+_OEM_EPOCH_RE = re.compile(r'(\d{4})-(\d{3})T(\d{2}):(\d{2}):(\d{2})(?:\.(\d{1,6}))?Z')
+
+@dataclass(eq=False)
+class OemData:
+    """
+    State vectors of an OEM document stored as one contiguous array per component
+    (struct-of-arrays), so speed and epoch computations run as vectorized NumPy operations,
+    along with the document's header, metadata and comments.
+
+    Indexing an OemData with an integer returns that state vector as a dictionary.
+    """
+    epoch_strs: np.ndarray
+    epochs: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+    z: np.ndarray
+    x_dot: np.ndarray
+    y_dot: np.ndarray
+    z_dot: np.ndarray
+    # Speed of every state vector; velocities never change, so this is computed once at ingest
+    speeds: np.ndarray
+    # Geodetic position of every state vector, filled in by compute_location_astropy
+    lat: Optional[np.ndarray] = None
+    lon: Optional[np.ndarray] = None
+    height: Optional[np.ndarray] = None
+    header: Dict = field(default_factory=dict)
+    metadata: Dict = field(default_factory=dict)
+    comments: List[str] = field(default_factory=list)
+    # Maps each epoch string to its index, for O(1) lookups by the /epochs/<epoch> routes
+    epoch_index: Dict[str, int] = field(default_factory=dict)
+    # HTTP validators of the response the data was parsed from, sent back on the next fetch
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.epochs)
+
+    def __getitem__(self, i: int) -> Dict:
+        return {
+            'epoch': str(self.epoch_strs[i]),
+            'x': float(self.x[i]),
+            'y': float(self.y[i]),
+            'z': float(self.z[i]),
+            'x_dot': float(self.x_dot[i]),
+            'y_dot': float(self.y_dot[i]),
+            'z_dot': float(self.z_dot[i])
+        }
+
+    @cached_property
+    def static_json(self) -> Dict[str, Tuple[bytes, str]]:
+        """
+        The serialized JSON body and ETag of the comment, header and metadata routes,
+        built once per OemData since they only change when the document does.
+        """
+        static_json = {}
+        for name, value in (('comment', self.comments), ('header', self.header), ('metadata', self.metadata)):
+            body = app.json.dumps(value).encode()
+            static_json[name] = (body, hashlib.sha1(body).hexdigest())
+        return static_json
+
+    @property
+    def epochs_ns(self) -> np.ndarray:
+        """
+        The epochs as int64 nanoseconds since the Unix epoch (a view, not a copy).
+        """
+        return self.epochs.view('i8')
+
+def to_datetime64(dt: datetime) -> np.datetime64:
+    """
+    Converts a datetime to a UTC datetime64[ns]; timezone-aware values are converted to UTC first.
+    """
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(dt, 'ns')
+
+def closest_epoch_index(epochs_ns: np.ndarray, t: datetime) -> int:
+    """
+    Finds the index of the epoch closest to the given time with a binary search.
+    OEM state vectors are sorted by epoch, so only the two neighbours of the
+    insertion point need to be compared.
+
+    Args:
+        epochs_ns (np.ndarray): Sorted epochs as int64 nanoseconds.
+        t (datetime): The time to find the closest epoch to.
+
+    Returns:
+        int: The index of the closest epoch.
+    """
+    return closest_index_ns(epochs_ns, int(to_datetime64(t).astype(np.int64)))
+
+def closest_index_ns(epochs_ns: np.ndarray, t_ns: int) -> int:
+    """
+    Finds the index of the epoch closest to a time given as int64 nanoseconds since the Unix epoch.
+    Only the two neighbours of the binary search insertion point are compared.
+
+    Args:
+        epochs_ns (np.ndarray): Sorted epochs as int64 nanoseconds.
+        t_ns (int): The time in nanoseconds since the Unix epoch.
+
+    Returns:
+        int: The index of the closest epoch.
+    """
+    i = int(np.searchsorted(epochs_ns, t_ns))
+    if i == len(epochs_ns) or (i > 0 and t_ns - epochs_ns[i - 1] <= epochs_ns[i] - t_ns):
+        i -= 1
+    return i
+
+def compute_location_astropy(data: OemData) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Converts every state vector from GCRS to geodetic latitude, longitude and height
+    in a single batched astropy transform.
+
+    Args:
+        data (OemData): The parsed state vectors.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Latitude and longitude in degrees, height in km.
+    """
+    # the epochs were parsed once at ingest, so astropy takes them as-is
+    obstime = Time(data.epochs, format='datetime64', scale='utc')
+
+    cartrep = coordinates.CartesianRepresentation(data.x, data.y, data.z, unit=units.km)
+    gcrs = coordinates.GCRS(cartrep, obstime=obstime)
+    itrs = gcrs.transform_to(coordinates.ITRS(obstime=obstime))
+    loc = coordinates.EarthLocation.from_geocentric(*itrs.cartesian.xyz)
+
+    return loc.lat.value, loc.lon.value, loc.height.to_value(units.km)
 
-    # assumes epoch is in format '2024-067T08:28:00.000Z'
-    this_epoch=time.strftime('%Y-%m-%d %H:%m:%S', time.strptime(sv['EPOCH'][:-5], '%Y-%jT%H:%M:%S'))
 
-    cartrep = coordinates.CartesianRepresentation([x, y, z], unit=units.km)
-    gcrs = coordinates.GCRS(cartrep, obstime=this_epoch)
-    itrs = gcrs.transform_to(coordinates.ITRS(obstime=this_epoch))
-    loc = coordinates.EarthLocation(*itrs.cartesian.xyz)
+# One pooled keep-alive session for all downloads, so refreshes skip the TCP and TLS handshakes
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                                       max_retries=Retry(total=3, backoff_factor=0.2)))
 
-    return loc.lat.value, loc.lon.value, loc.height.value
- 
+_geolocator = Nominatim(user_agent="iss_tracker_app")
 
-def get_xml_data():
-    response = requests.get(ISS_DATA_URL)
-    return ET.fromstring(response.content)
+@lru_cache(maxsize=4096)
+def _reverse(lat_q: float, lon_q: float):
+    return _geolocator.reverse(f'{lat_q}, {lon_q}', zoom=15, language="en")
 
-def fetch_iss_data(url: str) -> str:
+def geolocate(latitude: float, longitude: float) -> Optional[str]:
     """
-    Fetches the ISS trajectory data from the specified URL using the requests library.
+    Reverse geocodes a position to a place name. Coordinates are rounded to 3 decimals
+    (~100 m) so repeated passes over the same ground track hit the cache.
+
+    Args:
+        latitude (float): Latitude in degrees.
+        longitude (float): Longitude in degrees.
+
+    Returns:
+        str: The place name, "Over the ocean" if there is none, or None if the geocoder failed.
+    """
+    try:
+        location = _reverse(round(latitude, 3), round(longitude, 3))
+    except GeopyError as e:  # failures raise, so lru_cache does not keep them
+        logging.error(f"Error reverse geocoding {latitude}, {longitude}: {e}")
+        return None
+    return location.raw["display_name"] if location is not None else "Over the ocean"
+
+def oem_cache_key(data: OemData) -> Optional[str]:
+    """
+    Returns the name of the on-disk cache entry for the given data: the SHA-1 of the
+    Last-Modified header (or ETag) of the response it came from, or None if it had neither.
+    """
+    version = data.last_modified or data.etag
+    if version is None:
+        return None
+    return hashlib.sha1(version.encode()).hexdigest()
+
+def save_oem_cache(data: OemData, cache_dir: str = CACHE_DIR) -> None:
+    """
+    Saves fully computed OEM data to the on-disk cache, keyed by the Last-Modified header
+    (or ETag) of the response it came from. The entry is written to a temporary directory
+    and renamed into place, so readers never see a partial entry.
+
+    Args:
+        data (OemData): The parsed data, with locations computed.
+        cache_dir (str): The cache directory.
+    """
+    key = oem_cache_key(data)
+    if key is None:
+        return
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        entry = os.path.join(cache_dir, key)
+        if not os.path.isdir(entry):
+            tmp = tempfile.mkdtemp(prefix=CACHE_TMP_PREFIX, dir=cache_dir)
+            for name in CACHED_ARRAYS:
+                np.save(os.path.join(tmp, f'{name}.npy'), getattr(data, name))
+            with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+                json.dump({'header': data.header, 'metadata': data.metadata, 'comments': data.comments,
+                           'etag': data.etag, 'last_modified': data.last_modified}, f)
+            try:
+                os.rename(tmp, entry)
+            except OSError:
+                shutil.rmtree(tmp, ignore_errors=True)
+                if not os.path.isdir(entry):
+                    raise
+                # otherwise another worker saved the same version first
+        fd, tmp_latest = tempfile.mkstemp(prefix=CACHE_TMP_PREFIX, dir=cache_dir)
+        with os.fdopen(fd, 'w') as f:
+            f.write(key)
+        os.replace(tmp_latest, os.path.join(cache_dir, 'latest'))
+        # only prune completed entries; other workers' temporary directories may still be in use
+        for name in os.listdir(cache_dir):
+            path = os.path.join(cache_dir, name)
+            if name != key and _CACHE_ENTRY_RE.fullmatch(name) and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+    except OSError as e:
+        logging.error(f"Error saving ISS data cache: {e}")
+
+def latest_oem_cache_key(cache_dir: str = CACHE_DIR) -> Optional[str]:
+    """
+    Returns the name of the latest entry in the on-disk cache, or None if there is none.
+    """
+    try:
+        with open(os.path.join(cache_dir, 'latest')) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def load_oem_cache(cache_dir: str = CACHE_DIR) -> Optional[OemData]:
+    """
+    Loads the latest OEM data from the on-disk cache. The arrays are memory-mapped read-only,
+    so all worker processes share the same pages.
+
+    Args:
+        cache_dir (str): The cache directory.
+
+    Returns:
+        OemData: The cached data, or None if there is no usable cache entry.
+    """
+    try:
+        with open(os.path.join(cache_dir, 'latest')) as f:
+            entry = os.path.join(cache_dir, f.read().strip())
+        arrays = {name: np.load(os.path.join(entry, f'{name}.npy'), mmap_mode='r') for name in CACHED_ARRAYS}
+        with open(os.path.join(entry, 'meta.json')) as f:
+            meta = json.load(f)
+        # meta.json written by another version of this code may not match the OemData fields
+        return OemData(**arrays, **meta,
+                       epoch_index={epoch: i for i, epoch in enumerate(arrays['epoch_strs'].tolist())})
+    except (OSError, ValueError, TypeError, KeyError) as e:
+        logging.info(f"No usable ISS data cache: {e}")
+        return None
+
+# The most recently loaded data, revalidated against the server once it is CACHE_TIMEOUT seconds old
+_latest_oem_data: Optional[OemData] = None
+# time.monotonic() after which _latest_oem_data is loaded or revalidated again
+_refresh_at: Optional[float] = None
+# Held while refreshing, so only one thread downloads when the data expires
+_refresh_lock = threading.Lock()
+
+def _load_oem_data() -> OemData:
+    global _latest_oem_data
+    # another worker may already have downloaded and transformed a newer version; if so,
+    # use it and revalidate it instead of repeating the download and transform here
+    latest_key = latest_oem_cache_key()
+    if latest_key is not None and (_latest_oem_data is None or latest_key != oem_cache_key(_latest_oem_data)):
+        _latest_oem_data = load_oem_cache() or _latest_oem_data
+    try:
+        data = fetch_iss_data(ISS_DATA_URL, _latest_oem_data)
+        if data is None:
+            raise ValueError("Failed to fetch ISS data")
+        if data is not _latest_oem_data:
+            data.lat, data.lon, data.height = compute_location_astropy(data)
+    except Exception as e:
+        if _latest_oem_data is None:
+            raise
+        logging.warning(f"Failed to refresh ISS data, serving the previously loaded data: {e}")
+        return _latest_oem_data
+    if data is not _latest_oem_data:
+        save_oem_cache(data)
+        _latest_oem_data = data
+    return data
+
+class OemDataUnavailable(Exception):
+    """
+    Raised by get_oem_data when no ISS data has been loaded yet.
+    """
+
+def _is_stale() -> bool:
+    return _refresh_at is None or time.monotonic() >= _refresh_at
+
+def _refresh() -> None:
+    global _refresh_at
+    try:
+        _load_oem_data()
+    except Exception as e:
+        # nothing to serve, so retry shortly rather than after a whole cache period
+        logging.error(f"Failed to load ISS data, retrying in {LOAD_RETRY_DELAY} s: {e}")
+        _refresh_at = time.monotonic() + LOAD_RETRY_DELAY
+    else:
+        # a failed refresh of loaded data is retried once per cache period, not on every request
+        _refresh_at = time.monotonic() + CACHE_TIMEOUT
+
+def get_oem_data() -> OemData:
+    """
+    Returns the parsed ISS OEM data, downloading and parsing it at most once per CACHE_TIMEOUT,
+    with the geodetic position of every state vector precomputed. All routes share the same data.
+    When it expires one thread refreshes it while the others keep serving the data already loaded;
+    callers only wait for the refresh when nothing has been loaded yet.
+
+    Raises:
+        OemDataUnavailable: If no data could be loaded; loading is retried after LOAD_RETRY_DELAY.
+    """
+    if _is_stale():
+        if _latest_oem_data is None:
+            with _refresh_lock:
+                # another thread may have loaded the data while this one waited for the lock
+                if _is_stale():
+                    _refresh()
+        elif _refresh_lock.acquire(blocking=False):
+            try:
+                if _is_stale():
+                    _refresh()
+            finally:
+                _refresh_lock.release()
+    if _latest_oem_data is None:
+        raise OemDataUnavailable("No ISS data loaded")
+    return _latest_oem_data
+
+def fetch_iss_data(url: str, previous: Optional[OemData] = None) -> Optional[OemData]:
+    """
+    Fetches and parses the ISS trajectory data from the specified URL using the requests library.
+    The response body is streamed straight into the parser, so parsing proceeds while the
+    download is still in progress and the raw document is never held in memory.
 
     Args:
         url (str): The URL from which to fetch the ISS data.
+        previous (OemData): Data from an earlier fetch. Its validators are sent with the request,
+            and it is returned as-is if the server reports the document unchanged.
 
     Returns:
-        str: The content of the ISS data as a string if successful, None otherwise.
+        OemData: The parsed ISS data, or None if the download failed or was not well-formed XML.
+        A well-formed document whose state vectors cannot be parsed raises the parser's error.
     """
 
+    headers = {}
+    if previous is not None:
+        if previous.etag:
+            headers['If-None-Match'] = previous.etag
+        if previous.last_modified:
+            headers['If-Modified-Since'] = previous.last_modified
+
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raises an HTTPError for bad responses
-        return response.text
-    except requests.RequestException as e:
+        with _session.get(url, headers=headers, stream=True, timeout=REQUEST_TIMEOUT) as response:
+            if response.status_code == 304 and previous is not None:
+                return previous
+            response.raise_for_status()  # Raises an HTTPError for bad responses
+            response.raw.decode_content = True  # Let urllib3 undo any gzip transfer encoding
+            data = parse_oem_data(response.raw)
+            data.etag = response.headers.get('ETag')
+            data.last_modified = response.headers.get('Last-Modified')
+            return data
+    # the body is read while parsing, so a dropped or truncated download surfaces
+    # as a urllib3 or XML syntax error rather than a RequestException
+    except (requests.RequestException, urllib3.exceptions.HTTPError, etree.XMLSyntaxError) as e:
         logging.error(f"Error fetching ISS data: {e}")
         return None
 
-@app.route('/epochs?limit=int&offset=int', methods=['GET'])
-def parse_oem_data(xml_content: str) -> List[Dict]:
+def parse_oem_data(xml_content: Union[str, bytes, IO[bytes]]) -> OemData:
     """
-    Parses the OEM data from an XML content string and returns it as a list of dictionaries.
+    Parses the OEM data from XML content into one array per state vector component.
+    The document is streamed with lxml's iterparse and each stateVector is discarded
+    once read, so the full tree is never held in memory.
 
     Args:
-        xml_content (str): The XML content as a string.
+        xml_content (Union[str, bytes, IO[bytes]]): The XML content, or a binary file-like object to read it from.
 
     Returns:
-        List[Dict]: A list of dictionaries with the parsed data.
+        OemData: The parsed state vectors, header, metadata and comments.
     """
     try:
-        root = ET.fromstring(xml_content)
-        data = []
-        for state_vector in root.iter('stateVector'):
-            data_point = {
-                'epoch': state_vector.find('EPOCH').text,
-                'x': float(state_vector.find('X').text),
-                'y': float(state_vector.find('Y').text),
-                'z': float(state_vector.find('Z').text),
-                'x_dot': float(state_vector.find('X_DOT').text),
-                'y_dot': float(state_vector.find('Y_DOT').text),
-                'z_dot': float(state_vector.find('Z_DOT').text)
-            }
-            data.append(data_point)
-        return data
-        offset = int(request.args.get("offset", 0))
-        if offset<0:
-            raise ValueError
-        limit = int(request.args.get("limit",0))
-        if limit<0:
-            raise ValueError
-    except ET.ParseError as e:
+        if isinstance(xml_content, str):
+            xml_content = xml_content.encode()
+        if isinstance(xml_content, bytes):
+            xml_content = io.BytesIO(xml_content)
+        epoch_strs, x, y, z, x_dot, y_dot, z_dot = [], [], [], [], [], [], []
+        header, metadata, comments = {}, {}, []
+        # unlike ElementTree, lxml keeps <!-- --> comments as elements unless told otherwise
+        context = etree.iterparse(xml_content, events=('end',), remove_comments=True,
+                                  tag=('stateVector', 'header', 'metadata', 'COMMENT'))
+        for _, elem in context:
+            if elem.tag == 'stateVector':
+                # children are always EPOCH, X, Y, Z, X_DOT, Y_DOT, Z_DOT in that order
+                epoch_strs.append(elem[0].text)
+                x.append(float(elem[1].text))
+                y.append(float(elem[2].text))
+                z.append(float(elem[3].text))
+                x_dot.append(float(elem[4].text))
+                y_dot.append(float(elem[5].text))
+                z_dot.append(float(elem[6].text))
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+            elif elem.tag == 'COMMENT':
+                comments.extend((elem.text or '').splitlines())
+            elif elem.tag == 'header':
+                header = {child.tag: child.text for child in elem if child.tag != 'COMMENT'}
+            else:
+                metadata = {child.tag: child.text for child in elem if child.tag != 'COMMENT'}
+        epochs = np.array([to_datetime64(parse_approximate_time(epoch)) for epoch in epoch_strs],
+                          dtype='datetime64[ns]')
+        x_dot, y_dot, z_dot = np.array(x_dot), np.array(y_dot), np.array(z_dot)
+        return OemData(np.array(epoch_strs, dtype=str), epochs,
+                       np.array(x), np.array(y), np.array(z),
+                       x_dot, y_dot, z_dot, _speeds(x_dot, y_dot, z_dot),
+                       header=header, metadata=metadata, comments=comments,
+                       epoch_index={epoch: i for i, epoch in enumerate(epoch_strs)})
+    except etree.XMLSyntaxError as e:
         logging.error(f"Error parsing the XML content: {e}")
         raise
     except Exception as e:
         logging.error(f"An error occurred: {e}")
         raise
 
-@app.route('/epochs/<epoch>', methods=['GET'])
+@lru_cache(maxsize=65536)
 def parse_approximate_time(time_str: str) -> datetime:
     """
     Parses the time string to a datetime object, accommodating for different formats
     that might include or exclude the day or fractional seconds.
-    """
-    formats = [
-        '%Y-%jT%H:%M:%S.%fZ',  # Format with ordinal day and fractional seconds
-        '%Y-%jT%H:%M:%SZ',     # Format with ordinal day, without fractional seconds
-        '%Y-%m-%dT%H:%M:%S.%fZ',  # Format with month-day and fractional seconds
-        '%Y-%m-%dT%H:%M:%SZ',     # Format with month-day, without fractional seconds
-        # ... you can add more formats if needed
-    ]
 
-    for fmt in formats:
+    The ordinal-day format used by the NASA OEM feed is matched with a precompiled
+    regex first; the strptime formats are only tried when it does not match.
+    """
+    match = _OEM_EPOCH_RE.fullmatch(time_str)
+    if match:
+        year, day, hour, minute, second, fraction = match.groups()
+        year, day = int(year), int(day)
+        days_in_year = 366 if year % 4 == 0 and (year % 100 != 0 or year % 400 == 0) else 365
+        if 1 <= day <= days_in_year and int(hour) < 24 and int(minute) < 60 and int(second) < 60:
+            microsecond = int(fraction.ljust(6, '0')) if fraction else 0
+            return datetime(year, 1, 1, int(hour), int(minute), int(second), microsecond,
+                            tzinfo=timezone.utc) + timedelta(days=day - 1)
+
+    for fmt in TIME_FORMATS:
         try:
             parsed_time = datetime.strptime(time_str, fmt)
             if fmt.endswith('Z'):
@@ -125,7 +541,6 @@ def parse_approximate_time(time_str: str) -> datetime:
     logging.error(error_message)
     raise ValueError(error_message)
 
-@app.route('epoch/<epoch>/speed', methods=['GET'])
 def calculate_speed(x_dot: float, y_dot: float, z_dot: float) -> float:
     """
     Calculates the speed from Cartesian velocity vectors.
@@ -140,148 +555,181 @@ def calculate_speed(x_dot: float, y_dot: float, z_dot: float) -> float:
     """
     return math.sqrt(x_dot**2 + y_dot**2 + z_dot**2)
 
-@app.route('/now', methods=['GET'])
-def get_instantaneous_speed(data: List[Dict], closest_time: datetime) -> Tuple[Dict, float]:
+def get_instantaneous_speed(data: OemData, closest_time: datetime) -> Tuple[Dict, float]:
     """
     Gets the instantaneous speed for the state vector closest to the given time.
 
     Args:
-        data (List[Dict]): The list of state vectors.
+        data (OemData): The parsed state vectors.
         closest_time (datetime): The time to find the closest state vector to.
 
     Returns:
         Tuple[Dict, float]: The closest state vector and its speed.
     """
-    # Ensure that closest_time is offset-aware
-    closest_time = closest_time.replace(tzinfo=timezone.utc)
+    # Naive times are taken to be UTC; aware times keep their own offset
+    if closest_time.tzinfo is None:
+        closest_time = closest_time.replace(tzinfo=timezone.utc)
 
-    closest_vector = None
-    min_time_diff = timedelta.max
-
-    for point in data:
-        point_time = parse_approximate_time(point['epoch'])
-
-        # If point_time is not timezone-aware, assign UTC timezone to it
-        if point_time.tzinfo is None:
-            point_time = point_time.replace(tzinfo=timezone.utc)
-
-        # Calculate the time difference
-        time_diff = abs(point_time - closest_time)
+    if len(data) == 0:
+        raise ValueError("Could not find the closest vector.")
 
-        if time_diff < min_time_diff:
-            min_time_diff = time_diff
-            closest_vector = point
+    idx = closest_epoch_index(data.epochs_ns, closest_time)
+    return data[idx], float(data.speeds[idx])
 
-    if closest_vector is None:
-        raise ValueError("Could not find the closest vector.")
+@njit(cache=True, parallel=True, fastmath=True)
+def _speeds(x_dot: np.ndarray, y_dot: np.ndarray, z_dot: np.ndarray) -> np.ndarray:
+    speeds = np.empty_like(x_dot)
+    for i in prange(x_dot.size):
+        speeds[i] = math.sqrt(x_dot[i]*x_dot[i] + y_dot[i]*y_dot[i] + z_dot[i]*z_dot[i])
+    return speeds
 
-    speed = calculate_speed(closest_vector['x_dot'], closest_vector['y_dot'], closest_vector['z_dot'])
-    return closest_vector, speed
+# Compile the kernel at import rather than on the first request
+_speeds(np.zeros(1), np.zeros(1), np.zeros(1))
 
-def get_average_speed(data: List[Dict]) -> float:
+def get_average_speed(data: OemData) -> float:
     """
     Calculates the average speed over the provided dataset.
 
     Args:
-        data (List[Dict]): The list of state vectors.
+        data (OemData): The parsed state vectors.
 
     Returns:
         float: The average speed.
     """
-    total_speed = sum(calculate_speed(point['x_dot'], point['y_dot'], point['z_dot']) for point in data)
-    return total_speed / len(data)
+    return float(data.speeds.mean())
 
-@app.route('/epochs', methods=['GET'])
-def print_data_range(data: List[Dict]):
+def print_data_range(data: OemData):
     """
     Prints the range of data using timestamps from the first and last epochs.
 
     Args:
-        data (List[Dict]): The list of state vectors.
+        data (OemData): The parsed state vectors.
     """
-    if data:
-        start_epoch = data[0]['epoch']
-        end_epoch = data[-1]['epoch']
+    if len(data):
+        start_epoch = data.epoch_strs[0]
+        end_epoch = data.epoch_strs[-1]
         print(f"The range of data is from {start_epoch} to {end_epoch}")
 
+def static_json_response(name: str) -> Response:
+    """
+    Serves one of the precomputed OemData.static_json bodies, answering 304 Not Modified
+    when the client already has it.
+
+    Args:
+        name (str): 'comment', 'header' or 'metadata'.
+
+    Returns:
+        Response: The JSON response.
+    """
+    body, etag = get_oem_data().static_json[name]
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+@app.errorhandler(OemDataUnavailable)
+def data_unavailable(e):
+    return 'ISS data is not available yet', 503, {'Retry-After': str(LOAD_RETRY_DELAY)}
+
 @app.route('/comment', methods=['GET'])
 def comment():
-    root = get_xml_data()
-    comments = root.find('comment').text.splitlines()  #assumes comments are newline separated
-    return jsonify(comments)
+    return static_json_response('comment')
 
 @app.route('/header', methods=['GET'])
 def header():
-    root = get_xml_data()
-    header = {child.tag: child.text for child in root.find('header')}
-    return jsonify(header)
+    return static_json_response('header')
 
 @app.route('/metadata', methods=['GET'])
 def metadata():
-    root = get_xml_data()
-    metadata = {child.tag: child.text for child in root.find('metadata')}
-    return jsonify(metadata)
+    return static_json_response('metadata')
+
+@app.route('/epochs', methods=['GET'])
+def epochs():
+    data = get_oem_data()
+    try:
+        offset = int(request.args.get('offset', 0))
+        limit = int(request.args.get('limit', len(data)))
+    except ValueError:
+        return 'offset and limit must be non-negative integers', 400
+    if offset < 0 or limit < 0:
+        return 'offset and limit must be non-negative integers', 400
+    # slices of the arrays are views, so only the requested rows are touched
+    sl = slice(offset, offset + limit)
+    return jsonify({
+        'epochs': data.epoch_strs[sl],
+        'x': data.x[sl],
+        'y': data.y[sl],
+        'z': data.z[sl],
+        'x_dot': data.x_dot[sl],
+        'y_dot': data.y_dot[sl],
+        'z_dot': data.z_dot[sl],
+    })
+
+@app.route('/epochs/<epoch>', methods=['GET'])
+def epoch_position(epoch):
+    data = get_oem_data()
+    i = data.epoch_index.get(epoch)
+    if i is None:
+        return 'Epoch not found', 404
+    return jsonify({
+        'latitude': float(data.lat[i]),
+        'longitude': float(data.lon[i]),
+        'altitude': float(data.height[i]),
+    })
+
+@app.route('/epoch/<epoch>/speed', methods=['GET'])
+@app.route('/epochs/<epoch>/speed', methods=['GET'])
+def epoch_speed(epoch):
+    data = get_oem_data()
+    i = data.epoch_index.get(epoch)
+    if i is None:
+        return 'Epoch not found', 404
+    return jsonify({'speed': data.speeds[i]})
 
 @app.route('/epochs/<epoch>/location', methods=['GET'])
 def epoch_location(epoch):
-    root = get_xml_data()
-    for state_vector in root.iter('stateVector'):
-        if state_vector.find('EPOCH').text == epoch:
-            latitude, longitude, altitude = compute_location_astropy(state_vector)
-            coordinates = f'{latitude}, {longitude}'
-            geolocator = Nominatim(user_agent="iss_tracker_app")
-            location = geolocator.reverse(coordinates, zoom=15, language="en")
-        if location is None:
-            location = "Over the ocean"
-        location =  location.raw["display_name"]
+    data = get_oem_data()
+    i = data.epoch_index.get(epoch)
+    if i is None:
+        return 'Epoch not found', 404
+    latitude, longitude, altitude = float(data.lat[i]), float(data.lon[i]), float(data.height[i])
     return jsonify({
-        'latitude': state_vector.find('latitude').text,
-        'longitude': state_vector.find('longitude').text,
+        'latitude': latitude,
+        'longitude': longitude,
+        'altitude': altitude,
+        'location': geolocate(latitude, longitude),
     })
-    return 'Epoch not found', 404
 
 @app.route('/now', methods=['GET'])
 def now():
-    root = get_xml_data()
-    closest_state_vector = None
-    min_time_diff = None
-    now = datetime.now(pytz.utc)
-    for state_vector in root.iter('stateVector'):
-        epoch = datetime.strptime(state_vector.find('EPOCH').text, '%Y-%jT%H:%M:%SZ')
-        epoch = epoch.replace(tzinfo=pytz.utc)
-        time_diff = abs((now - epoch).total_seconds())
-        if min_time_diff is None or time_diff < min_time_diff:
-            min_time_diff = time_diff
-            closest_state_vector = state_vector
-    if closest_state_vector: 
-        latitude, longitude, altitude = compute_location_astropy(closest_state_vector)
-        location =  location.raw["display_name"]
-        coordinates = f'{latitude}, {longitude}'
-        geolocator = Nominatim(user_agent="iss_tracker_app")
-        location = geolocator.reverse(coordinates, zoom=15, language="en")     
-        return jsonify({
-            'latitude': latitude,
-            'longitude': longitude,
-            'altitude': altitude,
-        })
-    return 'Current location not found', 404
+    data = get_oem_data()
+    if len(data) == 0:
+        return 'Current location not found', 404
+    # _now_ns() is already in the epochs_ns units, so no datetime is built per request
+    i = closest_index_ns(data.epochs_ns, _now_ns())
+    latitude, longitude, altitude = float(data.lat[i]), float(data.lon[i]), float(data.height[i])
+    return jsonify({
+        'latitude': latitude,
+        'longitude': longitude,
+        'altitude': altitude,
+        'location': geolocate(latitude, longitude),
+    })
+
+# Cleared while a start-up warm-up is loading the ISS data; requests wait on it so they
+# reuse the warm-up's download instead of starting their own
+_warmed_up = threading.Event()
+_warmed_up.set()
+
+@app.before_request
+def wait_for_warmup():
+    _warmed_up.wait()
 
 def main():
     """
-    Main execution function to process the ISS OEM data from XML content.
-
-    Args:
-        xml_content (str): The XML content as a string.
+    Main execution function to load the ISS OEM data into the cache and report on it.
     """
 
-    iss_data_url = 'https://nasa-public-data.s3.amazonaws.com/iss-coords/current/ISS_OEM/ISS.OEM_J2K_EPH.xml'
-
     try:
-        xml_content = fetch_iss_data(iss_data_url)
-        if xml_content is None:
-            raise ValueError("Failed to fetch ISS data")
-
-        data = parse_oem_data(xml_content)
+        data = get_oem_data()
 
         average_speed = get_average_speed(data)
         logging.info(f"Average speed over the whole dataset: {average_speed:.2f} m/s")
@@ -299,6 +747,25 @@ def main():
     except Exception as e:
         logging.error(f"An unexpected error occurred: {e}")
 
+def start_warmup() -> threading.Thread:
+    """
+    Runs main() in a background thread, so the server accepts connections while the ISS data
+    is downloaded, parsed and transformed. Requests arriving in the meantime wait for it.
+
+    Returns:
+        threading.Thread: The warm-up thread.
+    """
+    def warmup():
+        try:
+            main()
+        finally:
+            _warmed_up.set()
+
+    _warmed_up.clear()
+    thread = threading.Thread(target=warmup, daemon=True)
+    thread.start()
+    return thread
+
 if __name__ == "__main__":
-    main()
-    app.run(debug=True, host='0.0.0.0')  
+    start_warmup()
+    app.run(debug=True, host='0.0.0.0')
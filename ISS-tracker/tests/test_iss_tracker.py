@@ -1,6 +1,15 @@
+import hashlib
+from decimal import Decimal
+import io
+import threading
+import time
 import pytest
-from iss_tracker import parse_oem_data, calculate_speed, get_average_speed, get_instantaneous_speed
-from datetime import datetime
+import numpy as np
+from geopy.exc import GeocoderUnavailable
+import iss_tracker
+from iss_tracker import (parse_oem_data, calculate_speed, get_average_speed, get_instantaneous_speed, get_oem_data,
+                         load_oem_cache, save_oem_cache)
+from datetime import datetime, timedelta, timezone
 # Sample XML data for testing
 SAMPLE_XML = """
 <root>
@@ -25,6 +34,36 @@ SAMPLE_XML = """
 </root>
 """
 
+class FakeResponse:
+    """
+    Stands in for the streamed response fetch_iss_data reads the OEM document from.
+    """
+    def __init__(self, body: bytes = b'', status_code: int = 200):
+        self.status_code = status_code
+        self.headers = {}
+        self.raw = io.BytesIO(body)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+@pytest.fixture
+def cold_cache(monkeypatch):
+    """
+    Starts get_oem_data with nothing loaded, in memory or on disk, and a cheap location transform.
+    """
+    monkeypatch.setattr(iss_tracker, 'latest_oem_cache_key', lambda: None)
+    monkeypatch.setattr(iss_tracker, 'load_oem_cache', lambda: None)
+    monkeypatch.setattr(iss_tracker, 'save_oem_cache', lambda data: None)
+    monkeypatch.setattr(iss_tracker, '_latest_oem_data', None)
+    monkeypatch.setattr(iss_tracker, '_refresh_at', None)
+    monkeypatch.setattr(iss_tracker, 'compute_location_astropy', lambda data: (data.x, data.y, data.z))
+
 # The actual tests
 
 def test_parse_oem_data():
@@ -38,6 +77,18 @@ def test_parse_oem_data():
     assert len(data) == 2, "Parsing did not return expected number of state vectors"
     assert data[0]['epoch'] == "2024-02-23T00:00:00Z", "First epoch is not correct"
 
+def test_parse_oem_data_arrays():
+    """
+    Test that parse_oem_data stores each state vector component in its own array,
+    with epochs converted to datetime64 values.
+    """
+    data = parse_oem_data(SAMPLE_XML)
+    assert data.speeds.tolist() == [1.0, 1.0], "Speeds were not precomputed"
+    assert data.epochs.dtype == np.dtype('datetime64[ns]'), "Epochs were not stored as datetime64"
+    assert data.epochs[1] == np.datetime64('2024-02-24T00:00:00'), "Second epoch is not correct"
+    assert data.x.tolist() == [678.0, 700.0], "X components are not correct"
+    assert data.y_dot.tolist() == [0.0, 1.0], "Y velocity components are not correct"
+    assert data == data and data != parse_oem_data(SAMPLE_XML), "OemData is not compared by identity"
 
 def test_calculate_speed():
     """
@@ -67,3 +118,460 @@ def test_get_instantaneous_speed():
     closest_vector, speed = get_instantaneous_speed(data, closest_time)
     assert closest_vector['epoch'] == "2024-02-23T00:00:00Z", "Did not find correct closest state vector"
     assert speed == 1, "Instantaneous speed calculation is incorrect"
+
+def test_get_oem_data_is_cached(monkeypatch, cold_cache):
+    """
+    Test that get_oem_data downloads and parses the OEM document only once per cache period,
+    so every route shares the same parsed data.
+    """
+    calls = []
+
+    def fake_fetch(url, previous=None):
+        calls.append(url)
+        return parse_oem_data(SAMPLE_XML)
+
+    monkeypatch.setattr(iss_tracker, 'fetch_iss_data', fake_fetch)
+    first = get_oem_data()
+    second = get_oem_data()
+    assert len(calls) == 1, "OEM data was fetched more than once"
+    assert first is second, "Cached OEM data was not reused"
+
+def test_get_oem_data_concurrent_refresh(monkeypatch, cold_cache):
+    """
+    Test that threads calling get_oem_data while the cache is being refreshed
+    wait for that refresh instead of each downloading the data again.
+    """
+    calls = []
+
+    def slow_fetch(url, previous=None):
+        calls.append(url)
+        time.sleep(0.2)
+        return parse_oem_data(SAMPLE_XML)
+
+    monkeypatch.setattr(iss_tracker, 'fetch_iss_data', slow_fetch)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(get_oem_data())) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1, "Concurrent callers each fetched the data"
+    assert all(result is results[0] for result in results), "Callers did not share the refreshed data"
+
+def test_get_oem_data_stale_while_revalidate(monkeypatch, cold_cache):
+    """
+    Test that once data is loaded, callers keep getting it while another thread refreshes
+    the expired data, instead of waiting for that refresh.
+    """
+    previous = parse_oem_data(SAMPLE_XML)
+    refreshed = parse_oem_data(SAMPLE_XML)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_fetch(url, previous=None):
+        started.set()
+        release.wait(5)
+        return refreshed
+
+    monkeypatch.setattr(iss_tracker, 'fetch_iss_data', slow_fetch)
+    monkeypatch.setattr(iss_tracker, '_latest_oem_data', previous)
+    results = []
+    refresher = threading.Thread(target=lambda: results.append(get_oem_data()))
+    refresher.start()
+    assert started.wait(5), "Expired data was not refreshed"
+    assert get_oem_data() is previous, "Caller waited for the refresh instead of serving the loaded data"
+    release.set()
+    refresher.join()
+    assert results == [refreshed], "Refreshing thread did not return the refreshed data"
+    assert get_oem_data() is refreshed, "Refreshed data was not served afterwards"
+
+def test_parse_oem_data_header_metadata_comments():
+    """
+    Test that parse_oem_data collects the header, metadata and comments of a full OEM document
+    alongside its state vectors, ignoring XML comments.
+    """
+    xml = """
+    <ndm><oem>
+        <header><!-- generated by JSC --><CREATION_DATE>2024-067T12:00:00.000Z</CREATION_DATE><ORIGINATOR>JSC</ORIGINATOR></header>
+        <body><segment>
+            <metadata><OBJECT_NAME>ISS</OBJECT_NAME><CENTER_NAME>EARTH</CENTER_NAME></metadata>
+            <data>
+                <COMMENT>Units are in kg and m^2</COMMENT>
+                <COMMENT>MASS=459325.00</COMMENT>
+                <stateVector>
+                    <EPOCH>2024-067T12:00:00.000Z</EPOCH>
+                    <X>1.0</X><Y>2.0</Y><Z>3.0</Z>
+                    <X_DOT>4.0</X_DOT><Y_DOT>5.0</Y_DOT><Z_DOT>6.0</Z_DOT>
+                </stateVector>
+            </data>
+        </segment></body>
+    </oem></ndm>
+    """
+    data = parse_oem_data(io.BytesIO(xml.encode()))
+    assert data.header == {'CREATION_DATE': '2024-067T12:00:00.000Z', 'ORIGINATOR': 'JSC'}, "Header is not correct"
+    assert data.metadata == {'OBJECT_NAME': 'ISS', 'CENTER_NAME': 'EARTH'}, "Metadata is not correct"
+    assert data.comments == ['Units are in kg and m^2', 'MASS=459325.00'], "Comments are not correct"
+    assert len(data) == 1 and data[0]['z_dot'] == 6.0, "State vector is not correct"
+
+def test_closest_epoch_index():
+    """
+    Test that closest_epoch_index picks the nearer of the two neighbouring epochs,
+    and clamps times outside the data range to the first or last epoch.
+    """
+    data = parse_oem_data(SAMPLE_XML)
+    later = datetime.strptime("2024-02-23T20:00:00Z", '%Y-%m-%dT%H:%M:%SZ')
+    before = datetime.strptime("2024-01-01T00:00:00Z", '%Y-%m-%dT%H:%M:%SZ')
+    after = datetime.strptime("2024-03-01T00:00:00Z", '%Y-%m-%dT%H:%M:%SZ')
+    assert iss_tracker.closest_epoch_index(data.epochs_ns, later) == 1, "Did not pick the nearer epoch"
+    assert iss_tracker.closest_epoch_index(data.epochs_ns, before) == 0, "Time before the range was not clamped"
+    assert iss_tracker.closest_epoch_index(data.epochs_ns, after) == 1, "Time after the range was not clamped"
+
+def test_parse_approximate_time_oem_format():
+    """
+    Test that parse_approximate_time handles the ordinal-day format of the OEM feed
+    and agrees with strptime for it.
+    """
+    parsed = iss_tracker.parse_approximate_time("2024-067T08:28:00.500Z")
+    expected = datetime.strptime("2024-067T08:28:00.500Z", '%Y-%jT%H:%M:%S.%fZ').replace(tzinfo=timezone.utc)
+    assert parsed == expected, "Ordinal-day epoch was parsed incorrectly"
+    with pytest.raises(ValueError):
+        iss_tracker.parse_approximate_time("2024-067T25:00:00.000Z")
+
+def test_geolocate_is_cached(monkeypatch):
+    """
+    Test that geolocate reuses the reverse geocoding result for positions that round
+    to the same coordinates, and falls back to "Over the ocean" when there is no place.
+    """
+    calls = []
+
+    def fake_reverse(query, zoom, language):
+        calls.append(query)
+        return None
+
+    monkeypatch.setattr(iss_tracker._geolocator, 'reverse', fake_reverse)
+    iss_tracker._reverse.cache_clear()
+    first = iss_tracker.geolocate(10.00001, 20.00001)
+    second = iss_tracker.geolocate(10.00002, 20.00002)
+    iss_tracker._reverse.cache_clear()
+    assert first == second == "Over the ocean", "Missing place was not reported as ocean"
+    assert len(calls) == 1, "Reverse geocoding was not cached"
+
+def test_fetch_iss_data_not_modified(monkeypatch):
+    """
+    Test that fetch_iss_data sends the validators of previously fetched data
+    and reuses that data when the server answers 304 Not Modified.
+    """
+    sent_headers = []
+
+    def fake_get(url, headers, stream, timeout):
+        sent_headers.append(headers)
+        return FakeResponse(status_code=304)
+
+    monkeypatch.setattr(iss_tracker._session, 'get', fake_get)
+    previous = parse_oem_data(SAMPLE_XML)
+    previous.etag = '"abc"'
+    previous.last_modified = 'Wed, 06 Mar 2024 12:00:00 GMT'
+    data = iss_tracker.fetch_iss_data(iss_tracker.ISS_DATA_URL, previous)
+    assert data is previous, "Unchanged data was not reused"
+    assert sent_headers == [{'If-None-Match': '"abc"', 'If-Modified-Since': 'Wed, 06 Mar 2024 12:00:00 GMT'}], \
+        "Conditional request headers were not sent"
+
+def test_compute_location_astropy():
+    """
+    Test that compute_location_astropy converts each state vector at its own epoch:
+    a fixed inertial position 6790 km from the geocenter should sit at ISS altitude,
+    with the longitude drifting as the Earth rotates between epochs.
+    """
+    data = parse_oem_data(SAMPLE_XML.replace('678.0', '3920.2').replace('700.0', '3920.2'))
+    lat, lon, height = iss_tracker.compute_location_astropy(data)
+    assert len(lat) == len(lon) == len(height) == 2, "Did not return one position per state vector"
+    assert 300 < height[0] < 500, "Altitude is not in low Earth orbit"
+    assert lon[0] != pytest.approx(lon[1], abs=0.1), "Longitude did not change between epochs"
+
+def test_epoch_route(monkeypatch):
+    """
+    Test that /epochs/<epoch> returns the precomputed position of the epoch, as documented,
+    looking it up in the precomputed index, and returns 404 for epochs that are not in the data.
+    """
+    data = parse_oem_data(SAMPLE_XML)
+    data.lat, data.lon, data.height = np.array([1.0, 2.0]), np.array([3.0, 4.0]), np.array([400.0, 410.0])
+    monkeypatch.setattr(iss_tracker, 'get_oem_data', lambda: data)
+    client = iss_tracker.app.test_client()
+    response = client.get('/epochs/2024-02-24T00:00:00Z')
+    assert response.status_code == 200, "Existing epoch was not found"
+    assert response.get_json() == {'latitude': 2.0, 'longitude': 4.0, 'altitude': 410.0}, \
+        "Returned position is not correct"
+    assert client.get('/epochs/2024-02-25T00:00:00Z').status_code == 404, "Missing epoch did not return 404"
+
+def test_oem_cache_round_trip(tmp_path):
+    """
+    Test that OEM data saved to the on-disk cache loads back memory-mapped and unchanged,
+    and that a missing cache yields None.
+    """
+    assert iss_tracker.load_oem_cache(str(tmp_path)) is None, "Empty cache did not return None"
+    data = parse_oem_data(SAMPLE_XML)
+    data.lat, data.lon, data.height = data.x, data.y, data.z
+    data.last_modified = 'Wed, 06 Mar 2024 12:00:00 GMT'
+    iss_tracker.save_oem_cache(data, str(tmp_path))
+    loaded = iss_tracker.load_oem_cache(str(tmp_path))
+    assert isinstance(loaded.x, np.memmap), "Cached arrays were not memory-mapped"
+    assert loaded[1] == data[1], "Cached state vector does not match"
+    assert loaded.epoch_index == data.epoch_index, "Epoch index was not rebuilt"
+    assert loaded.last_modified == data.last_modified, "Validators were not cached"
+
+def test_load_oem_cache_mismatched_meta(tmp_path):
+    """
+    Test that a cache entry whose meta.json does not match the OemData fields,
+    such as one written by another version, is treated as no usable cache.
+    """
+    data = parse_oem_data(SAMPLE_XML)
+    data.lat, data.lon, data.height = data.x, data.y, data.z
+    data.last_modified = 'Wed, 06 Mar 2024 12:00:00 GMT'
+    iss_tracker.save_oem_cache(data, str(tmp_path))
+    entry = tmp_path / (tmp_path / 'latest').read_text()
+    (entry / 'meta.json').write_text('{"unknown_field": 1}')
+    assert iss_tracker.load_oem_cache(str(tmp_path)) is None, "Mismatched meta.json did not return None"
+
+def test_get_oem_data_uses_newer_disk_cache(tmp_path, monkeypatch, cold_cache):
+    """
+    Test that a refresh picks up a newer version another worker saved to the on-disk cache
+    and revalidates it, instead of downloading and transforming the document again.
+    """
+    loaded = parse_oem_data(SAMPLE_XML)
+    loaded.last_modified = 'Wed, 06 Mar 2024 12:00:00 GMT'
+    newer = parse_oem_data(SAMPLE_XML)
+    newer.lat, newer.lon, newer.height = newer.x, newer.y, newer.z
+    newer.last_modified = 'Thu, 07 Mar 2024 12:00:00 GMT'
+    save_oem_cache(newer, str(tmp_path))
+    previous_sent = []
+
+    def not_modified_fetch(url, previous=None):
+        previous_sent.append(previous)
+        return previous
+
+    def unexpected_transform(data):
+        raise AssertionError("Cached data was transformed again")
+
+    monkeypatch.setattr(iss_tracker, 'latest_oem_cache_key', lambda: iss_tracker.oem_cache_key(newer))
+    monkeypatch.setattr(iss_tracker, 'load_oem_cache', lambda: load_oem_cache(str(tmp_path)))
+    monkeypatch.setattr(iss_tracker, 'fetch_iss_data', not_modified_fetch)
+    monkeypatch.setattr(iss_tracker, 'compute_location_astropy', unexpected_transform)
+    monkeypatch.setattr(iss_tracker, '_latest_oem_data', loaded)
+    data = get_oem_data()
+    assert data.last_modified == newer.last_modified, "Newer cached version was not used"
+    assert previous_sent == [data], "Validators of the cached version were not sent"
+
+def test_header_route_etag(monkeypatch):
+    """
+    Test that /header serves the precomputed JSON with an ETag
+    and answers 304 when the client sends that ETag back.
+    """
+    data = parse_oem_data(SAMPLE_XML)
+    data.header = {'ORIGINATOR': 'JSC'}
+    monkeypatch.setattr(iss_tracker, 'get_oem_data', lambda: data)
+    client = iss_tracker.app.test_client()
+    response = client.get('/header')
+    assert response.status_code == 200, "Header route failed"
+    assert response.get_json() == {'ORIGINATOR': 'JSC'}, "Header is not correct"
+    etag = response.headers['ETag']
+    assert client.get('/header', headers={'If-None-Match': etag}).status_code == 304, "Matching ETag did not return 304"
+
+def test_epochs_route_pagination(monkeypatch):
+    """
+    Test that /epochs applies offset and limit to the returned rows
+    and rejects negative values.
+    """
+    monkeypatch.setattr(iss_tracker, 'get_oem_data', lambda: parse_oem_data(SAMPLE_XML))
+    client = iss_tracker.app.test_client()
+    assert len(client.get('/epochs').get_json()['epochs']) == 2, "Unpaginated request did not return every epoch"
+    page = client.get('/epochs?offset=1&limit=1').get_json()
+    assert page['epochs'] == ["2024-02-24T00:00:00Z"], "Offset and limit were not applied to epochs"
+    assert page['x'] == [700.0], "Offset and limit were not applied to positions"
+    assert client.get('/epochs?offset=-1').status_code == 400, "Negative offset was not rejected"
+
+def test_now_route(monkeypatch):
+    """
+    Test that /now returns the precomputed position of the state vector closest to the current time.
+    """
+    data = parse_oem_data(SAMPLE_XML)
+    data.lat, data.lon, data.height = np.array([1.0, 2.0]), np.array([3.0, 4.0]), np.array([400.0, 410.0])
+    monkeypatch.setattr(iss_tracker, 'get_oem_data', lambda: data)
+    monkeypatch.setattr(iss_tracker, 'geolocate', lambda latitude, longitude: "Over the ocean")
+    current = np.datetime64('2024-02-23T20:00:00', 'ns').astype(np.int64)
+    monkeypatch.setattr(iss_tracker, '_now_ns', lambda: int(current))
+    response = iss_tracker.app.test_client().get('/now')
+    assert response.get_json() == {'latitude': 2.0, 'longitude': 4.0, 'altitude': 410.0, 'location': "Over the ocean"}, \
+        "Did not return the position closest to now"
+
+def test_get_instantaneous_speed_aware_time():
+    """
+    Test that get_instantaneous_speed honours the offset of a timezone-aware time
+    instead of overwriting it with UTC.
+    """
+    data = parse_oem_data(SAMPLE_XML)
+    # 2024-02-23T10:00 at UTC-10 is 2024-02-23T20:00 UTC, closer to the second epoch
+    closest_time = datetime(2024, 2, 23, 10, 0, tzinfo=timezone(timedelta(hours=-10)))
+    closest_vector, speed = get_instantaneous_speed(data, closest_time)
+    assert closest_vector['epoch'] == "2024-02-24T00:00:00Z", "Timezone offset was ignored"
+
+def test_start_warmup(monkeypatch):
+    """
+    Test that start_warmup runs main in the background and releases waiting requests
+    once it finishes.
+    """
+    calls = []
+
+    def fake_main():
+        assert not iss_tracker._warmed_up.is_set(), "Requests were not held during the warm-up"
+        calls.append(True)
+
+    monkeypatch.setattr(iss_tracker, 'main', fake_main)
+    thread = iss_tracker.start_warmup()
+    thread.join()
+    assert calls == [True], "Warm-up did not run main"
+    assert iss_tracker._warmed_up.is_set(), "Requests were left waiting after the warm-up"
+
+def test_geolocate_error(monkeypatch):
+    """
+    Test that geolocate returns None when the geocoder fails, without caching the failure.
+    """
+    calls = []
+
+    def failing_reverse(query, zoom, language):
+        calls.append(query)
+        raise GeocoderUnavailable("Nominatim is down")
+
+    monkeypatch.setattr(iss_tracker._geolocator, 'reverse', failing_reverse)
+    iss_tracker._reverse.cache_clear()
+    assert iss_tracker.geolocate(10.0, 20.0) is None, "Geocoder failure was not reported as None"
+    assert iss_tracker.geolocate(10.0, 20.0) is None, "Geocoder failure was not reported as None"
+    iss_tracker._reverse.cache_clear()
+    assert len(calls) == 2, "Geocoder failure was cached"
+
+def test_fetch_iss_data_truncated(monkeypatch):
+    """
+    Test that fetch_iss_data returns None when the streamed body is cut off mid-document.
+    """
+    truncated = SAMPLE_XML.encode()[:200]
+    monkeypatch.setattr(iss_tracker._session, 'get', lambda url, headers, stream, timeout: FakeResponse(truncated))
+    assert iss_tracker.fetch_iss_data(iss_tracker.ISS_DATA_URL) is None, "Truncated download did not return None"
+
+@pytest.mark.parametrize('body', [
+    SAMPLE_XML.replace('2024-02-23T00:00:00Z', 'not an epoch'),
+    SAMPLE_XML.replace('<Z_DOT>0.0</Z_DOT>', '', 1),
+    SAMPLE_XML.replace('<X>678.0</X>', '<X/>'),
+])
+def test_fetch_iss_data_invalid_document(monkeypatch, body):
+    """
+    Test that fetch_iss_data leaves the parse errors of a well-formed document whose
+    state vectors cannot be parsed to its caller, rather than reporting a failed download.
+    """
+    monkeypatch.setattr(iss_tracker._session, 'get', lambda url, headers, stream, timeout: FakeResponse(body.encode()))
+    with pytest.raises((ValueError, IndexError, TypeError)):
+        iss_tracker.fetch_iss_data(iss_tracker.ISS_DATA_URL)
+
+def failing_fetch(url, previous=None):
+    return None
+
+def raising_fetch(url, previous=None):
+    raise ValueError("Time data 'not an epoch' does not match any of the known formats")
+
+@pytest.mark.parametrize('fetch', [failing_fetch, raising_fetch])
+def test_get_oem_data_failed_refresh(monkeypatch, cold_cache, fetch):
+    """
+    Test that get_oem_data keeps serving the previously loaded data when a refresh fails
+    or raises, without retrying the fetch until the next cache period.
+    """
+    calls = []
+
+    def counting_fetch(url, previous=None):
+        calls.append(url)
+        return fetch(url, previous)
+
+    previous = parse_oem_data(SAMPLE_XML)
+    monkeypatch.setattr(iss_tracker, 'fetch_iss_data', counting_fetch)
+    monkeypatch.setattr(iss_tracker, '_latest_oem_data', previous)
+    monkeypatch.setattr(iss_tracker, '_refresh_at', None)
+    assert get_oem_data() is previous, "Previous data was not served after a failed refresh"
+    assert get_oem_data() is previous, "Previous data was not served after a failed refresh"
+    assert len(calls) == 1, "Failed refresh was retried within the same cache period"
+
+def test_get_oem_data_failed_cold_start(monkeypatch, cold_cache):
+    """
+    Test that when the first load fails, routes answer 503 and the load is retried
+    after LOAD_RETRY_DELAY rather than on every request or only after a whole cache period.
+    """
+    calls = []
+
+    def flaky_fetch(url, previous=None):
+        calls.append(url)
+        return parse_oem_data(SAMPLE_XML) if len(calls) > 1 else None
+
+    monkeypatch.setattr(iss_tracker, 'fetch_iss_data', flaky_fetch)
+    client = iss_tracker.app.test_client()
+    for _ in range(3):
+        response = client.get('/header')
+        assert response.status_code == 503, "Missing data did not return 503"
+    assert len(calls) == 1, "Failed load was retried before LOAD_RETRY_DELAY"
+    assert response.headers['Retry-After'] == str(iss_tracker.LOAD_RETRY_DELAY), "Retry-After was not sent"
+
+    monkeypatch.setattr(iss_tracker, '_refresh_at', time.monotonic())
+    assert client.get('/header').status_code == 200, "Failed load was not retried"
+    assert len(calls) == 2, "Failed load was not retried exactly once"
+
+def test_save_oem_cache_concurrent_writers(tmp_path):
+    """
+    Test that save_oem_cache leaves other workers' in-progress entries alone, and does not
+    point 'latest' at an entry that failed to be written.
+    """
+    in_progress = tmp_path / (iss_tracker.CACHE_TMP_PREFIX + 'other')
+    in_progress.mkdir()
+    data = parse_oem_data(SAMPLE_XML)
+    data.lat, data.lon, data.height = data.x, data.y, data.z
+    data.last_modified = 'Wed, 06 Mar 2024 12:00:00 GMT'
+    iss_tracker.save_oem_cache(data, str(tmp_path))
+    assert in_progress.is_dir(), "Another worker's in-progress entry was pruned"
+
+    newer = parse_oem_data(SAMPLE_XML)
+    newer.lat, newer.lon, newer.height = newer.x, newer.y, newer.z
+    newer.last_modified = 'Thu, 07 Mar 2024 12:00:00 GMT'
+    # a plain file where the entry directory should go makes renaming into place fail
+    (tmp_path / hashlib.sha1(newer.last_modified.encode()).hexdigest()).write_text('')
+    iss_tracker.save_oem_cache(newer, str(tmp_path))
+    loaded = iss_tracker.load_oem_cache(str(tmp_path))
+    assert loaded.last_modified == data.last_modified, "'latest' was moved to an entry that was never written"
+
+def test_orjson_provider():
+    """
+    Test that the orjson JSON provider keeps Flask's defaults: sorted keys
+    and serialization of types such as Decimal.
+    """
+    assert iss_tracker.app.json.dumps({'b': 1, 'a': Decimal('1.5')}) == '{"a":"1.5","b":1}', \
+        "Keys were not sorted or Decimal was not serialized"
+
+def test_epochs_route_from_disk_cache(tmp_path, monkeypatch):
+    """
+    Test that /epochs serializes the memory-mapped arrays of data loaded from the on-disk cache.
+    """
+    data = parse_oem_data(SAMPLE_XML)
+    data.lat, data.lon, data.height = data.x, data.y, data.z
+    data.last_modified = 'Wed, 06 Mar 2024 12:00:00 GMT'
+    iss_tracker.save_oem_cache(data, str(tmp_path))
+    loaded = iss_tracker.load_oem_cache(str(tmp_path))
+    monkeypatch.setattr(iss_tracker, 'get_oem_data', lambda: loaded)
+    response = iss_tracker.app.test_client().get('/epochs')
+    assert response.status_code == 200, "Cached data could not be serialized"
+    assert response.get_json()['epochs'] == ["2024-02-23T00:00:00Z", "2024-02-24T00:00:00Z"], "Epochs are not correct"
+    assert response.get_json()['x'] == [678.0, 700.0], "Positions are not correct"
+
+def test_epoch_speed_route(monkeypatch):
+    """
+    Test that the speed route returns the precomputed speed for an epoch under both its
+    documented /epoch/ path and the /epochs/ path, and 404 for epochs that are not in the data.
+    """
+    monkeypatch.setattr(iss_tracker, 'get_oem_data', lambda: parse_oem_data(SAMPLE_XML))
+    client = iss_tracker.app.test_client()
+    for prefix in ('/epoch/', '/epochs/'):
+        response = client.get(prefix + '2024-02-24T00:00:00Z/speed')
+        assert response.status_code == 200, "Existing epoch was not found"
+        assert response.get_json() == {'speed': 1.0}, "Returned speed is not correct"
+    assert client.get('/epoch/2024-02-25T00:00:00Z/speed').status_code == 404, "Missing epoch did not return 404"